@@ -13,17 +13,21 @@ from locust.stats import stats_history, StatsCSVFileWriter
 from data.loadtest.locust.teastore_fast import UserBehavior
 # imports
 import datetime as dt
+import functools
+from dataclasses import dataclass
 import logging
 import os
 import time
-import json
 
 from dotenv import load_dotenv, set_key
 
-from prometheus_api_client import PrometheusConnect, MetricRangeDataFrame, MetricSnapshotDataFrame
+from prometheus_api_client import PrometheusConnect
 
 import numpy as np
+import orjson
 import pandas as pd
+import pyarrow as pa
+from pyarrow import csv as pa_csv
 import k8s_tools as k8s
 import requests
 
@@ -34,6 +38,53 @@ load_dotenv(override=True)
 p = logging.getLogger(__name__)
 p.setLevel(logging.INFO)
 
+# custom prometheus queries
+CUSTOM_QUERIES = {
+    "cpu": '(sum(rate(container_cpu_usage_seconds_total{namespace="teastore", container!=""}[1m])) by (pod, '
+           'container) /sum(container_spec_cpu_quota{namespace="teastore", '
+           'container!=""}/container_spec_cpu_period{namespace="teastore", container!=""}) by (pod, '
+           'container) )*100',
+    "memory": 'round(max by (pod)(max_over_time(container_memory_usage_bytes{namespace="teastore",pod=~".*" }['
+              '1m]))/ on (pod) (max by (pod) (kube_pod_container_resource_limits)) * 100,0.01)',
+    "rps": 'sum(irate(request_total{deployment="teastore-webui", direction="inbound"}[1m]))',
+    "response_time": 'sum(response_latency_ms_sum{deployment="teastore-webui", direction="inbound"})/sum('
+                     'response_latency_ms_count{deployment="teastore-webui", direction="inbound"})',
+    "median_latency": 'histogram_quantile(0.5, sum(irate(response_latency_ms_bucket{deployment="teastore-webui", '
+                      'direction="inbound"}[1m])) by (le, replicaset)) ',
+    "latency95": 'histogram_quantile(0.95, sum(irate(response_latency_ms_bucket{deployment="teastore-webui", '
+                 'direction="inbound"}[1m])) by (le, replicaset)) '
+}
+# rps and average response time of the webui in one query, distinguished by the metric label
+NETWORK_STATUS_QUERY = " or ".join(
+    f'label_replace({CUSTOM_QUERIES[m]}, "metric", "{m}", "", "")' for m in ["rps", "response_time"])
+# current parameters, distinguished by the metric name
+PARAMETER_STATUS_QUERY = '{__name__=~"kube_pod_container_resource_limits_(cpu_cores|memory_bytes)' \
+                         '|kube_deployment_spec_replicas"}'
+# prometheus clients by host
+prometheus_clients = dict()
+
+
+@dataclass(frozen=True)
+class BenchConfig:
+    """Environment values of a benchmark which are parsed once before the iterations."""
+    hh: int
+    mm: int
+    ui: str
+    scale_pod: str
+
+    @classmethod
+    def from_env(cls) -> "BenchConfig":
+        """Reads the benchmark configuration from the environment.
+
+        Args:
+
+        Returns:
+          benchmark configuration
+
+        """
+        return cls(hh=int(os.getenv("HH")), mm=int(os.getenv("MM")), ui=os.getenv("UI"),
+                   scale_pod=os.getenv("SCALE_POD"))
+
 
 def config_env(**kwargs) -> None:
     """Configures the environment file.
@@ -80,46 +131,43 @@ def get_prometheus_data(folder: str, iteration: int, hh: int, mm: int) -> None:
         "container_cpu_cfs_throttled_seconds_total",
         "kube_deployment_spec_replicas"
     ]
-    # get resource metric data resources
-    resource_metrics_data = get_prometheus_metric(metric_name=resource_metrics[0], mode="RESOURCES", custom=False,
-                                                  hh=hh, mm=mm)
-    for x in range(1, len(resource_metrics)):
-        resource_metrics_data = resource_metrics_data + get_prometheus_metric(metric_name=resource_metrics[x],
-                                                                              mode="RESOURCES", custom=False, hh=hh,
-                                                                              mm=mm)
-    # get custom resource metric data resources
-    # memory usage
-    custom_memory = get_prometheus_metric(metric_name="memory", mode="RESOURCES", custom=True, hh=hh, mm=mm)
-    custom_memory = MetricRangeDataFrame(custom_memory)
-    custom_memory.insert(0, 'metric', "memory")
-    # cpu usage
-    custom_cpu = get_prometheus_metric(metric_name="cpu", mode="RESOURCES", custom=True, hh=hh, mm=mm)
-    custom_cpu = MetricRangeDataFrame(custom_cpu)
-    custom_cpu.insert(0, 'metric', "cpu")
-    # rps
-    custom_rps = get_prometheus_metric(metric_name="rps", mode="NETWORK", custom=True, hh=hh, mm=mm)
-    custom_rps = MetricRangeDataFrame(custom_rps)
-    custom_rps.insert(0, 'metric', "rps")
-    # average response time
-    custom_latency = get_prometheus_metric(metric_name="response_time", mode="NETWORK", custom=True, hh=hh, mm=mm)
-    custom_latency = MetricRangeDataFrame(custom_latency)
-    custom_latency.insert(0, 'metric', "response_time")
-    # median response time
-    custom_med_latency = get_prometheus_metric(metric_name="median_latency", mode="NETWORK", custom=True, hh=hh, mm=mm)
-    custom_med_latency = MetricRangeDataFrame(custom_med_latency)
-    custom_med_latency.insert(0, 'metric', "median_latency")
-    # 95th percentile latency
-    custom_95_latency = get_prometheus_metric(metric_name="latency95", mode="NETWORK", custom=True, hh=hh, mm=mm)
-    custom_95_latency = MetricRangeDataFrame(custom_95_latency)
-    custom_95_latency.insert(0, 'metric', "latency95")
-    # convert to dataframe
-    metrics_data = resource_metrics_data
-    metric_df = MetricRangeDataFrame(metrics_data)
-    custom_metrics_df = pd.concat(
-        [custom_cpu, custom_memory, custom_rps, custom_latency, custom_med_latency, custom_95_latency])
+    custom_metrics = [("cpu", "RESOURCES"), ("memory", "RESOURCES"), ("rps", "NETWORK"), ("response_time", "NETWORK"),
+                      ("median_latency", "NETWORK"), ("latency95", "NETWORK")]
+    # query all metrics concurrently
+    resource_jobs = [gevent.spawn(get_prometheus_metric, metric_name=m, mode="RESOURCES", custom=False, hh=hh, mm=mm)
+                     for m in resource_metrics]
+    custom_jobs = [gevent.spawn(get_prometheus_metric, metric_name=m, mode=mode, custom=True, hh=hh, mm=mm)
+                   for m, mode in custom_metrics]
+    gevent.joinall(resource_jobs + custom_jobs, raise_error=True)
+    # flatten samples of resource metrics
+    resource_rows = [{"timestamp": t, **sample["metric"], "value": v}
+                     for job in resource_jobs for sample in job.value for t, v in sample["values"]]
+    # flatten samples of custom metrics
+    custom_rows = [{"timestamp": t, "metric": metric, **sample["metric"], "value": v}
+                   for (metric, _), job in zip(custom_metrics, custom_jobs)
+                   for sample in job.value for t, v in sample["values"]]
     # write to csv file
-    metric_df.to_csv(rf"{folder}\metrics_{iteration}.csv")
-    custom_metrics_df.to_csv(rf"{folder}\custom_metrics_{iteration}.csv")
+    write_samples_csv(resource_rows, rf"{folder}\metrics_{iteration}.csv")
+    write_samples_csv(custom_rows, rf"{folder}\custom_metrics_{iteration}.csv")
+
+
+def write_samples_csv(rows: list, path: str) -> None:
+    """Writes flattened prometheus samples to a csv file.
+
+    Args:
+      rows: samples as dicts of timestamp, labels and value
+      path: path of the csv file
+      rows: list: 
+      path: str: 
+
+    Returns:
+      None
+
+    """
+    # union of all labels in order of appearance
+    columns = dict.fromkeys(key for row in rows for key in row)
+    table = pa.table({column: [row.get(column) for row in rows] for column in columns})
+    pa_csv.write_csv(table, path)
 
 
 def get_status(pod: str) -> (list, list):
@@ -135,84 +183,99 @@ def get_status(pod: str) -> (list, list):
 
     """
     # init
-    prom_res = PrometheusConnect(url=os.getenv(f'PROMETHEUS_RESOURCES_HOST'), disable_ssl=True)
-    prom_net = PrometheusConnect(url=os.getenv(f'PROMETHEUS_NETWORK_HOST'), disable_ssl=True)
-    # custom queries
-    cpu_usage_query = '(sum(rate(container_cpu_usage_seconds_total{namespace="teastore", container!=""}[1m])) by (pod, ' \
-                      'container) /sum(container_spec_cpu_quota{namespace="teastore", ' \
-                      'container!=""}/container_spec_cpu_period{namespace="teastore", container!=""}) by (pod, ' \
-                      'container) )*100'
-    memory_usage_query = 'round(max by (pod)(max_over_time(container_memory_usage_bytes{namespace="teastore",pod=~".*" }[' \
-                         '1m]))/ on (pod) (max by (pod) (kube_pod_container_resource_limits)) * 100,0.01)'
-    rps_query = 'sum(irate(request_total{deployment="teastore-webui", direction="inbound"}[1m]))'
-    response_time = 'sum(response_latency_ms_sum{deployment="teastore-webui", direction="inbound"})/sum(' \
-                    'response_latency_ms_count{deployment="teastore-webui", direction="inbound"})'
+    prom_res = get_prometheus_client("RESOURCES")
+    prom_net = get_prometheus_client("NETWORK")
     # target metrics
     cpu_usage = 0.0
     memory_usage = 0.0
     latency = 0.0
     # get cpu
-    cpu_usage_data = MetricSnapshotDataFrame(prom_res.custom_query(cpu_usage_query))
+    cpu_usage_data = prom_res.custom_query(CUSTOM_QUERIES["cpu"])
     try:
-        if 'pod' in cpu_usage_data.columns:
-            cpu_usage_data["pod"] = cpu_usage_data["pod"].str.split("-", n=2).str[1]
-            cpu_usage = cpu_usage_data.loc[(cpu_usage_data['pod'] == pod)].at[0, 'value']
-        elif not cpu_usage_data.empty:
-            cpu_usage = cpu_usage_data.at[0, 'value']
+        if any('pod' in sample['metric'] for sample in cpu_usage_data):
+            cpu_usage = get_pod_values(cpu_usage_data, "pod")[pod]
+        elif cpu_usage_data:
+            cpu_usage = cpu_usage_data[0]['value'][1]
     except Exception as err:
         logging.error(f"Error while gathering cpu usage: {err}")
         print(cpu_usage_data)
     # get memory
     try:
-        memory_usage_data = MetricSnapshotDataFrame(prom_res.custom_query(memory_usage_query))
-        if 'pod' in memory_usage_data.columns:
-            memory_usage_data["pod"] = memory_usage_data["pod"].str.split("-", n=2).str[1]
-            memory_usage = memory_usage_data.loc[(memory_usage_data['pod'] == pod)].at[0, 'value']
+        memory_usage_data = prom_res.custom_query(CUSTOM_QUERIES["memory"])
+        if any('pod' in sample['metric'] for sample in memory_usage_data):
+            memory_usage = get_pod_values(memory_usage_data, "pod")[pod]
         else:
-            memory_usage = memory_usage_data.at[0, 'value']
+            memory_usage = memory_usage_data[0]['value'][1]
     except Exception as err:
         logging.error(f"Error while gathering memory usage: {err}")
-    # get average response time
+    # get average response time and rps
+    network_values = dict()
     try:
-        latency_data = MetricSnapshotDataFrame(prom_net.custom_query(response_time))
-        if not latency_data.empty:
-            latency = latency_data.at[0, 'value']
-        else:
-            raise Exception
+        network_data = prom_net.custom_query(NETWORK_STATUS_QUERY)
+        network_values = {sample['metric']['metric']: sample['value'][1] for sample in network_data}
+        latency = network_values["response_time"]
     except Exception as err:
         logging.error(f"Error while gathering latency: {err}")
     targets = [float(cpu_usage), float(memory_usage), float(latency)]
-    # parameter metrics
-    # cpu
-    cpu_limit_data = MetricSnapshotDataFrame(
-        prom_res.get_current_metric_value("kube_pod_container_resource_limits_cpu_cores"))
-    # memory
-    memory_limit_data = MetricSnapshotDataFrame(
-        prom_res.get_current_metric_value("kube_pod_container_resource_limits_memory_bytes"))
-    # number of pods
-    number_of_pods_data = MetricSnapshotDataFrame(prom_res.get_current_metric_value("kube_deployment_spec_replicas"))
-    # rps
-    rps_data = MetricSnapshotDataFrame(prom_net.custom_query(rps_query))
+    # parameter metrics: cpu limit, memory limit and number of pods in one query
+    parameter_data = dict()
+    for sample in prom_res.custom_query(PARAMETER_STATUS_QUERY):
+        parameter_data.setdefault(sample['metric']['__name__'], []).append(sample)
     # filter
     cpu_limit = 0
     memory_limit = 0
     number_of_pods = 0
-    rps = 0.0
+    rps = network_values.get("rps", 0.0)
     try:
-        cpu_limit_data["pod"] = cpu_limit_data["pod"].str.split("-", n=2).str[1]
-        memory_limit_data["pod"] = memory_limit_data["pod"].str.split("-", n=2).str[1]
-        number_of_pods_data["pod"] = number_of_pods_data["pod"].str.split("-", n=2).str[1]
-        cpu_limit = cpu_limit_data.loc[(cpu_limit_data['pod'] == pod)]['value'].iloc[0]
-        memory_limit = memory_limit_data.loc[(memory_limit_data['pod'] == pod)]['value'].iloc[0]
-        number_of_pods = \
-            number_of_pods_data.loc[(number_of_pods_data['deployment'] == f"teastore-{pod}")]['value'].iloc[0]
-        rps = rps_data.at[0, 'value']
+        cpu_limit = get_pod_values(parameter_data["kube_pod_container_resource_limits_cpu_cores"], "pod")[pod]
+        memory_limit = get_pod_values(parameter_data["kube_pod_container_resource_limits_memory_bytes"], "pod")[pod]
+        number_of_pods = get_pod_values(parameter_data["kube_deployment_spec_replicas"], "deployment")[pod]
     except Exception as err:
         logging.error(f"Error while gathering parameter: {err}")
     parameters = [int(float(cpu_limit) * 1000), int(float(memory_limit) / 1048576), int(number_of_pods), float(rps)]
     return parameters, targets
 
 
+def get_pod_values(samples: list, label: str) -> dict:
+    """Maps the pod name of every sample in a raw metric snapshot to its value.
+
+    Args:
+      samples: raw result of a prometheus query
+      label: label which contains the pod or deployment name
+      samples: list: 
+      label: str: 
+
+    Returns:
+      values by pod name
+
+    """
+    values = dict()
+    for sample in samples:
+        # filter for pod name
+        name = sample['metric'].get(label, "").split("-", 2)
+        if len(name) > 1:
+            # keep first sample of each pod
+            values.setdefault(name[1], float(sample['value'][1]))
+    return values
+
+
+def get_prometheus_client(mode: str) -> PrometheusConnect:
+    """Returns the prometheus client for a given mode and reuses it for further queries.
+
+    Args:
+      mode: which prometheus to use
+      mode: str: 
+
+    Returns:
+      prometheus client
+
+    """
+    url = os.getenv(f'PROMETHEUS_{mode}_HOST')
+    if url not in prometheus_clients:
+        prometheus_clients[url] = PrometheusConnect(url=url, disable_ssl=True)
+    return prometheus_clients[url]
+
+
 def get_prometheus_metric(metric_name: str, mode: str, custom: bool, hh: int, mm: int) -> list:
     """Gets a given metric from prometheus in a given timeframe.
 
@@ -233,39 +296,13 @@ def get_prometheus_metric(metric_name: str, mode: str, custom: bool, hh: int, mm
 
     """
     # init
-    prom = PrometheusConnect(url=os.getenv(f'PROMETHEUS_{mode}_HOST'), disable_ssl=True)
+    prom = get_prometheus_client(mode)
     start_time = (dt.datetime.now() - dt.timedelta(hours=hh, minutes=mm))
-    # custom queries
-    cpu_usage = '(sum(rate(container_cpu_usage_seconds_total{namespace="teastore", container!=""}[1m])) by (pod, ' \
-                'container) /sum(container_spec_cpu_quota{namespace="teastore", ' \
-                'container!=""}/container_spec_cpu_period{namespace="teastore", container!=""}) by (pod, ' \
-                'container) )*100'
-    memory_usage = 'round(max by (pod)(max_over_time(container_memory_usage_bytes{namespace="teastore",pod=~".*" }[' \
-                   '1m]))/ on (pod) (max by (pod) (kube_pod_container_resource_limits)) * 100,0.01)'
-    rps = 'sum(irate(request_total{deployment="teastore-webui", direction="inbound"}[1m]))'
-    response_time = 'sum(response_latency_ms_sum{deployment="teastore-webui", direction="inbound"})/sum(' \
-                    'response_latency_ms_count{deployment="teastore-webui", direction="inbound"})'
-    median_latency = 'histogram_quantile(0.5, sum(irate(response_latency_ms_bucket{deployment="teastore-webui", ' \
-                     'direction="inbound"}[1m])) by (le, replicaset)) '
-    latency95 = 'histogram_quantile(0.95, sum(irate(response_latency_ms_bucket{deployment="teastore-webui", ' \
-                'direction="inbound"}[1m])) by (le, replicaset)) '
-    query = None
     # get data
     if custom:
-        if metric_name == "cpu":
-            query = cpu_usage
-        elif metric_name == "memory":
-            query = memory_usage
-        elif metric_name == "rps":
-            query = rps
-        elif metric_name == "response_time":
-            query = response_time
-        elif metric_name == "median_latency":
-            query = median_latency
-        elif metric_name == "latency95":
-            query = latency95
-        else:
-            logging.error("Accepts cpu, memory or rps but received " + metric_name)
+        query = CUSTOM_QUERIES.get(metric_name)
+        if query is None:
+            logging.error(f"Accepts {', '.join(CUSTOM_QUERIES.keys())} but received " + metric_name)
         metric_data = prom.custom_query_range(
             query=query,
             start_time=start_time,
@@ -371,6 +408,7 @@ def benchmark(name: str, load: list, spawn_rate: int, expressions: int,
     # init date
     # read new environment data
     load_dotenv(override=True)
+    bench_config = BenchConfig.from_env()
     date = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
     # create folder
     folder_path = os.path.join(os.getcwd(), "data", "raw", date)
@@ -389,8 +427,8 @@ def benchmark(name: str, load: list, spawn_rate: int, expressions: int,
     iteration = 1
     scale_only = "webui"
     # get variation
-    variations = parameter_variation_namespace(expressions, step, sample, load)
-    c_max, m_max, p_max, l_max = variations[os.getenv("UI")].shape
+    variations = parameter_variation_namespace(expressions, step, sample, load, bench_config.scale_pod)
+    c_max, m_max, p_max, l_max = variations[bench_config.ui]["cpu"].shape
 
     # benchmark
     logging.info("Starting Benchmark.")
@@ -405,39 +443,42 @@ def benchmark(name: str, load: list, spawn_rate: int, expressions: int,
                         # check that pod is scalable
                         if scale_only in pod:
                             # get parameter variation
-                            v = variations[pod][c, m, p, l]
+                            v_cpu = int(variations[pod]["cpu"][c, m, p, l])
+                            v_memory = int(variations[pod]["memory"][c, m, p, l])
+                            v_pods = int(variations[pod]["pods"][c, m, p, l])
                             # check if variation is empty
-                            if v[0] == 0 or v[1] == 0 or v[2] == 0:
+                            if v_cpu == 0 or v_memory == 0 or v_pods == 0:
                                 break
-                            logging.info(f"{pod}: cpu: {int(v[0])}m - memory: {int(v[1])}Mi - # pods: {int(v[2])}")
+                            logging.info(f"{pod}: cpu: {v_cpu}m - memory: {v_memory}Mi - # pods: {v_pods}")
                             # update resources of pod
-                            k8s.k8s_update_deployment(deployment_name=pod, cpu_limit=int(v[0]),
-                                                      memory_limit=int(v[1]),
-                                                      number_of_replicas=int(v[2]), replace=True)
-                            # wait for deployment
-                            time.sleep(90)
+                            k8s.k8s_update_deployment(deployment_name=pod, cpu_limit=v_cpu,
+                                                      memory_limit=v_memory,
+                                                      number_of_replicas=v_pods, replace=True)
+                            # wait for deployment and fall back to health check
+                            k8s.k8s_wait_for_deployment(deployment_name=pod)
                             while not k8s.check_teastore_health():
                                 time.sleep(10)
                     # start load test
                     logging.info("Start Load.")
                     if locust:
                         start_locust(iteration=iteration, folder=folder_path, history=history,
-                                     custom_shape=custom_shape, users=l, spawn_rate=spawn_rate, hh=int(os.getenv("HH")),
-                                     mm=int(os.getenv("MM")))
+                                     custom_shape=custom_shape, users=l, spawn_rate=spawn_rate, hh=bench_config.hh,
+                                     mm=bench_config.mm)
                     else:
                         start_jmeter(iteration, date, True, l)
                     # get prometheus data
-                    get_prometheus_data(folder=folder_path, iteration=iteration, hh=int(os.getenv("HH")),
-                                        mm=int(os.getenv("MM")))
+                    get_prometheus_data(folder=folder_path, iteration=iteration, hh=bench_config.hh,
+                                        mm=bench_config.mm)
                     iteration = iteration + 1
     k8s.k8s_delete_namespace()
     logging.info("Finished Benchmark.")
 
 
-def parameter_variation_namespace(expressions: int, step: int, sample: bool, load: list) -> dict:
+def parameter_variation_namespace(expressions: int, step: int, sample: bool, load: list, scale_pod: str) -> dict:
     """Generates the parameter variation matrix for every deployment in a namespace with given values.
 
     Args:
+      scale_pod: name of the scaled deployment
       load: load
       expressions: number of expressions
       step: size of step
@@ -446,6 +487,7 @@ def parameter_variation_namespace(expressions: int, step: int, sample: bool, loa
       step: int: 
       sample: bool: 
       load: list: 
+      scale_pod: str: 
 
     Returns:
       dict of parameter variation matrices
@@ -454,7 +496,7 @@ def parameter_variation_namespace(expressions: int, step: int, sample: bool, loa
     resource_requests = k8s.get_resource_requests()
     variation = dict()
     for p in resource_requests.keys():
-        if p == os.getenv("SCALE_POD"):
+        if p == scale_pod:
             logging.debug("Pod: " + p)
             # cpu
             p_cpu_request = int(resource_requests[p]["cpu"].split("m")[0])
@@ -474,9 +516,9 @@ def parameter_variation_namespace(expressions: int, step: int, sample: bool, loa
 
 def parameter_variation(pod: str, cpu_request: int, cpu_limit: int, memory_request: int, memory_limit: int,
                         pods_request: int,
-                        pods_limit: int, step: int, invert: bool, sample: bool, save: bool, load: list) -> np.array:
+                        pods_limit: int, step: int, invert: bool, sample: bool, save: bool, load: list) -> dict:
     """Calculates a matrix mit all combination of the parameters.
-    :return: parameter variation matrix
+    :return: parameter variation matrix with one array per parameter
 
     Args:
       pod: str: 
@@ -494,53 +536,85 @@ def parameter_variation(pod: str, cpu_request: int, cpu_limit: int, memory_reque
 
     Returns:
 
+    """
+    variation_matrix, df = compute_variation(cpu_request, cpu_limit, memory_request, memory_limit, pods_request,
+                                             pods_limit, step, invert, sample, tuple(load))
+    csv_path = os.path.join(os.getcwd(), "data", "raw", os.getenv("LAST_DATA"), f"{pod}_variation.csv")
+    logging.debug(df.head())
+    if save:
+        # save dataframe to csv
+        if not os.path.exists(csv_path):
+            df.to_csv(csv_path)
+    return variation_matrix
+
+
+@functools.lru_cache(maxsize=32)
+def compute_variation(cpu_request: int, cpu_limit: int, memory_request: int, memory_limit: int, pods_request: int,
+                      pods_limit: int, step: int, invert: bool, sample: bool, load: tuple) -> (dict, pd.DataFrame):
+    """Calculates the parameter variation matrix and its table once for every combination of arguments.
+
+    Args:
+      cpu_request: minimum cpu limit
+      cpu_limit: maximum cpu limit
+      memory_request: minimum memory limit
+      memory_limit: maximum memory limit
+      pods_request: minimum number of pods
+      pods_limit: maximum number of pods
+      step: size of step
+      invert: invert order of the parameters
+      sample: enable sample run
+      load: load values
+      cpu_request: int: 
+      cpu_limit: int: 
+      memory_request: int: 
+      memory_limit: int: 
+      pods_request: int: 
+      pods_limit: int: 
+      step: int: 
+      invert: bool: 
+      sample: bool: 
+      load: tuple: 
+
+    Returns:
+      read-only parameter variation matrix and data frame of all variations
+
     """
     # init parameters: (start, end, step)
     cpu = np.arange(cpu_request, cpu_limit, step, np.int32)
     memory = np.arange(memory_request, memory_limit, step, np.int32)
     pods = np.arange(pods_request, pods_limit + 1, 1, np.int32)
-    load = np.array(load, np.int32)
+    # float load axis, the variation csv stores RPS as float like the original row by row table
+    load = np.asarray(load, dtype=np.float64)
     if invert:
         cpu = np.flip(cpu)
         memory = np.flip(memory)
         pods = np.flip(pods)
-    iterations = np.arange(1, (cpu.size * memory.size * pods.size) + 1, 1).tolist()
     if sample:
         cpu = cpu[(cpu == cpu.min()) | (cpu == np.median(cpu)) | (cpu == cpu.max())]
         memory = memory[
             (memory == memory.min()) | (memory == np.median(memory)) | (memory == memory.max())]
-    # init dataframe
-    df = pd.DataFrame(index=iterations, columns=["CPU", "Memory", "Pods"])
-    csv_path = os.path.join(os.getcwd(), "data", "raw", os.getenv("LAST_DATA"), f"{pod}_variation.csv")
-    # init matrix
-    variation_matrix = np.zeros((cpu.size, memory.size, pods.size, load.size),
-                                dtype=[('cpu', np.int32), ('memory', np.int32), ('pods', np.int32), ('load', np.int32)])
-    # fill matrix
-    i = 1
-    for c in range(0, cpu.size):
-        for m in range(0, memory.size):
-            for p in range(0, pods.size):
-                for l in range(0, load.size):
-                    if sample:
-                        if m != c:
-                            print("here")
-                            break
-                    variation_matrix[c, m, p] = (cpu[c], memory[m], pods[p], load[l])
-                    # fill dataframe
-                    df.at[i, 'CPU'] = cpu[c]
-                    df.at[i, 'Memory'] = memory[m]
-                    df.at[i, 'Pods'] = pods[p]
-                    df.at[i, 'RPS'] = load[l]
-                    i = i + 1
-    logging.debug(df.head())
-    if save:
-        # save dataframe to csv
-        if not os.path.exists(csv_path):
-            df.to_csv(csv_path)
-    return variation_matrix
-
-
-def parameter_variation_array(cpu_limits: list, memory_limits: list, pod_limits: list, rps: float) -> np.array:
+    # init matrix with all combinations of the parameters
+    variation_matrix = dict(zip(["cpu", "memory", "pods", "load"],
+                                np.meshgrid(cpu, memory, pods, load, indexing='ij')))
+    # sample run only uses combinations with same cpu and memory index
+    if sample:
+        mask = np.broadcast_to(np.eye(cpu.size, memory.size, dtype=bool)[:, :, None, None],
+                               variation_matrix["cpu"].shape)
+    else:
+        mask = np.ones(variation_matrix["cpu"].shape, dtype=bool)
+    # fill dataframe
+    df = pd.DataFrame({'CPU': variation_matrix["cpu"][mask], 'Memory': variation_matrix["memory"][mask],
+                       'Pods': variation_matrix["pods"][mask], 'RPS': variation_matrix["load"][mask]},
+                      index=np.arange(1, np.count_nonzero(mask) + 1))
+    # empty combinations
+    for values in variation_matrix.values():
+        values[~mask] = 0
+        # cached result is shared between calls
+        values.setflags(write=False)
+    return variation_matrix, df
+
+
+def parameter_variation_array(cpu_limits: list, memory_limits: list, pod_limits: list, rps: float) -> dict:
     """Creates a parameter variation matrix given discrete values.
 
     Args:
@@ -554,20 +628,30 @@ def parameter_variation_array(cpu_limits: list, memory_limits: list, pod_limits:
       rps: float: 
 
     Returns:
-      parameter variation matrix
+      parameter variation matrix with one array per parameter
 
     """
     cpu = np.array(cpu_limits, dtype=np.int32)
     memory = np.array(memory_limits, dtype=np.int32)
     pods = np.array(pod_limits, dtype=np.int32)
-    variation_matrix = np.zeros((cpu.size, memory.size, pods.size, 1),
-                                dtype=[('cpu', np.int32), ('memory', np.int32), ('pods', np.int32),
-                                       ('load', np.float64)])
-    for c in range(0, cpu.size):
-        for m in range(0, memory.size):
-            for p in range(0, pods.size):
-                variation_matrix[c, m, p] = (cpu[c], memory[m], pods[p], rps)
-    return variation_matrix
+    load = np.array([rps], dtype=np.float64)
+    # init matrix with all combinations of the parameters
+    return dict(zip(["cpu", "memory", "pods", "load"], np.meshgrid(cpu, memory, pods, load, indexing='ij')))
+
+
+def flatten_variation(variation_matrix: dict) -> list:
+    """Flattens a parameter variation matrix into a list of parameter combinations.
+
+    Args:
+      variation_matrix: parameter variation matrix
+      variation_matrix: dict: 
+
+    Returns:
+      list of (cpu, memory, pods, load) combinations
+
+    """
+    return list(zip(variation_matrix["cpu"].ravel(), variation_matrix["memory"].ravel(),
+                    variation_matrix["pods"].ravel(), variation_matrix["load"].ravel()))
 
 
 def start_locust(iteration: int, folder: str, history: bool, custom_shape: bool, users: int, spawn_rate: int, hh: int,
@@ -638,24 +722,19 @@ def get_persistence_data() -> None:
     """
     base_path = os.path.join(os.getcwd(), "data", "loadtest")
     persistence_url = "http://localhost:30090/tools.descartes.teastore.persistence/rest"
-    # get category ids
-    categories_request = requests.get(persistence_url + "/categories").json()
-    tmp_categories = list()
-    for c in categories_request:
-        tmp_categories.append(c["id"])
-    with open(os.path.join(base_path, "categories.json"), 'x') as outfile:
-        json.dump(tmp_categories, outfile)
-    # get product ids
-    products_request = requests.get(persistence_url + "/products").json()
-    tmp_products = list()
-    for p in products_request:
-        tmp_products.append(p["id"])
-    with open(os.path.join(base_path, "products.json"), 'x') as outfile:
-        json.dump(tmp_products, outfile)
-    # get users
-    users = requests.get(persistence_url + "/users").json()
-    with open(os.path.join(base_path, "users.json"), 'x') as outfile:
-        json.dump(users, outfile)
+    with requests.Session() as session:
+        # get category ids
+        categories = [c["id"] for c in orjson.loads(session.get(persistence_url + "/categories").content)]
+        with open(os.path.join(base_path, "categories.json"), 'xb') as outfile:
+            outfile.write(orjson.dumps(categories))
+        # get product ids
+        products = [p["id"] for p in orjson.loads(session.get(persistence_url + "/products").content)]
+        with open(os.path.join(base_path, "products.json"), 'xb') as outfile:
+            outfile.write(orjson.dumps(products))
+        # get users
+        users = orjson.loads(session.get(persistence_url + "/users").content)
+        with open(os.path.join(base_path, "users.json"), 'xb') as outfile:
+            outfile.write(orjson.dumps(users))
 
 
 def start(name: str, load: list, spawn_rate: int, expressions: int, step: int, runs: int,
@@ -9,7 +9,12 @@ logging.getLogger().setLevel(logging.DEBUG)
 
 
 class UserBehavior(FastHttpUser):
-    """ """
+    """TeaStore user on top of geventhttpclient, used by the benchmark instead of the requests based teastore.py.
+
+    FastHttpSession does not raise connection errors, it returns them as responses with status code 0.
+    Unlike requests, the FastResponse of older locust versions has no ok attribute, so every request uses
+    catch_response=True and marks responses without status 200 as failed through the ResponseContextManager.
+    """
     @task(1)
     def load(self) -> None:
         """Simulates user behaviour.
@@ -42,11 +47,12 @@ class UserBehavior(FastHttpUser):
 
         """
         # load landing page
-        try:
-            self.client.get('/')
-            logging.debug("Loaded landing page.")
-        except Exception as err:
-            logging.error(f"Could not load landing page: {err}")
+        with self.client.get('/', catch_response=True) as res:
+            if res.status_code == 200:
+                logging.debug("Loaded landing page.")
+            else:
+                res.failure(f"status {res.status_code}")
+                logging.error(f"Could not load landing page: {res.status_code}")
 
     def login(self) -> None:
         """User login with random userid between 1 and 90.
@@ -58,18 +64,21 @@ class UserBehavior(FastHttpUser):
 
         """
         # load login page
-        try:
-            self.client.get('/login')
-            logging.debug("Loaded login page.")
-        except Exception as err:
-            logging.error(f"Could not load login page: {err}")
+        with self.client.get('/login', catch_response=True) as res:
+            if res.status_code == 200:
+                logging.debug("Loaded login page.")
+            else:
+                res.failure(f"status {res.status_code}")
+                logging.error(f"Could not load login page: {res.status_code}")
         # login
         user = randint(1, 99)
-        try:
-            self.client.post("/loginAction", params={"username": user, "password": "password"})
-        except Exception as err:
-            logging.error(
-                f"Could not login with username: {user} - status: {err}")
+        with self.client.post("/loginAction", params={"username": user, "password": "password"},
+                              catch_response=True) as res:
+            if res.status_code == 200:
+                logging.debug(f"Login with username: {user}")
+            else:
+                res.failure(f"status {res.status_code}")
+                logging.error(f"Could not login with username: {user} - status: {res.status_code}")
 
     def browse(self) -> None:
         """Simulates random browsing behaviour.
@@ -84,25 +93,27 @@ class UserBehavior(FastHttpUser):
         for i in range(1, randint(2, 5)):
             category_id = randint(2, 6)
             page = randint(1, 5)
-            try:
-                self.client.get("/category", params={"page": page, "category": category_id})
-                logging.debug(f"Visited category {category_id} on page 1")
-            except Exception as err:
-                logging.error(
-                    f"Could not visit category {category_id} on page {page}: {err}")
+            with self.client.get("/category", params={"page": page, "category": category_id},
+                                 catch_response=True) as res:
+                if res.status_code == 200:
+                    logging.debug(f"Visited category {category_id} on page 1")
+                else:
+                    res.failure(f"status {res.status_code}")
+                    logging.error(f"Could not visit category {category_id} on page {page}: {res.status_code}")
             product_id = randint(7, 506)
-            try:
-                self.client.get("/product", params={"id": product_id})
-                logging.debug(f"Visited product with id {product_id}.")
-            except Exception as err:
-                logging.error(
-                    f"Could not visit product {product_id}: {err}")
-            try:
-                self.client.post("/cartAction", params={"addToCart": "", "product id": product_id})
-                logging.debug(f"Added product {product_id} to cart.")
-            except Exception as err:
-                logging.error(
-                    f"Could not add product {product_id} to cart: status {err}")
+            with self.client.get("/product", params={"id": product_id}, catch_response=True) as res:
+                if res.status_code == 200:
+                    logging.debug(f"Visited product with id {product_id}.")
+                else:
+                    res.failure(f"status {res.status_code}")
+                    logging.error(f"Could not visit product {product_id}: {res.status_code}")
+            with self.client.post("/cartAction", params={"addToCart": "", "product id": product_id},
+                                  catch_response=True) as res:
+                if res.status_code == 200:
+                    logging.debug(f"Added product {product_id} to cart.")
+                else:
+                    res.failure(f"status {res.status_code}")
+                    logging.error(f"Could not add product {product_id} to cart: status {res.status_code}")
 
     def buy(self) -> None:
         """Simulates to buy products in the cart with sample user data.
@@ -124,11 +135,12 @@ class UserBehavior(FastHttpUser):
             "expirydate": "12/2050",
             "confirm": "Confirm"
         }
-        try:
-            self.client.post("/cartAction", params=user_data)
-            logging.debug(f"Bought products.")
-        except Exception as err:
-            logging.error(f"Could not buy products: {err}")
+        with self.client.post("/cartAction", params=user_data, catch_response=True) as res:
+            if res.status_code == 200:
+                logging.debug("Bought products.")
+            else:
+                res.failure(f"status {res.status_code}")
+                logging.error(f"Could not buy products: {res.status_code}")
 
     def visit_profile(self) -> None:
         """Visits user profile.
@@ -139,11 +151,12 @@ class UserBehavior(FastHttpUser):
         Returns:
 
         """
-        try:
-            self.client.get("/profile")
-            logging.debug("Visited profile page.")
-        except Exception as err:
-            logging.error(f"Could not visit profile page: {err}")
+        with self.client.get("/profile", catch_response=True) as res:
+            if res.status_code == 200:
+                logging.debug("Visited profile page.")
+            else:
+                res.failure(f"status {res.status_code}")
+                logging.error(f"Could not visit profile page: {res.status_code}")
 
     def logout(self) -> None:
         """User logout.
@@ -154,8 +167,9 @@ class UserBehavior(FastHttpUser):
         Returns:
 
         """
-        try:
-            self.client.post("/loginAction", params={"logout": ""})
-            logging.debug("Successful logout.")
-        except Exception as err:
-            logging.error(f"Could not log out: {err}")
+        with self.client.post("/loginAction", params={"logout": ""}, catch_response=True) as res:
+            if res.status_code == 200:
+                logging.debug("Successful logout.")
+            else:
+                res.failure(f"status {res.status_code}")
+                logging.error(f"Could not log out: {res.status_code}")
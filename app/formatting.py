@@ -1,12 +1,14 @@
 import logging
 import os
 import re
+from concurrent.futures import ThreadPoolExecutor
 
 import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 import seaborn as sns
 from dotenv import load_dotenv
+from pyarrow import csv as pa_csv
 
 # init
 load_dotenv()
@@ -22,12 +24,9 @@ def get_all_data() -> list:
     Returns:
 
     """
-    # init
-    all_data = list()
-    for d in get_directories():
-        p_data, c_data, l_data = get_data(d)
-        # append to list
-        all_data.append([p_data, c_data, l_data])
+    # read directories in parallel
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        all_data = [list(data) for data in executor.map(get_data, get_directories())]
     return all_data
 
 
@@ -44,57 +43,71 @@ def get_data(directory: str) -> (pd.DataFrame, pd.DataFrame, pd.DataFrame):
     """
     # config
     load_dotenv(override=True)
-    prometheus_data = None
-    prometheus_custom_data = None
-    locust_data = None
+    prometheus_data = list()
+    prometheus_custom_data = list()
+    locust_data = list()
     # check if folder exists
     data_path = os.path.join(os.getcwd(), "data", "raw", directory)
     if os.path.exists(data_path):
         # search for prometheus metric files
         logging.info(f"Gets data from {directory}.")
-        for (dir_path, dir_names, filenames) in os.walk(data_path):
-            for file in filenames:
-                if "metrics" in file and "custom_metrics" not in file:
-                    i = int(str(file).split("_")[1].rstrip(".csv"))
-                    prometheus_data = get_data_helper(prometheus_data, file, i, directory)
-                elif "custom_metrics" in file:
-                    j = int(str(file).split("_")[2].rstrip(".csv"))
-                    print(j)
-                    prometheus_custom_data = get_data_helper(prometheus_custom_data, file, j, directory)
-                elif "locust" in file and "stats" in file and "history" not in file:
-                    l = int(str(file).split("_")[2].rstrip(".csv"))
-                    locust_data = get_data_helper(locust_data, file, l, directory)
-    return prometheus_data, prometheus_custom_data, locust_data
-
-
-def get_data_helper(data: pd.DataFrame, file: str, iteration: int, directory: str) -> pd.DataFrame:
-    """Connects two dataframes.
+        with os.scandir(data_path) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                file = entry.name
+                if file.startswith("custom_metrics"):
+                    j = int(file.split("_")[2].rstrip(".csv"))
+                    prometheus_custom_data.append(read_iteration_data(data_path, file, j))
+                elif file.startswith("metrics"):
+                    i = int(file.split("_")[1].rstrip(".csv"))
+                    prometheus_data.append(read_iteration_data(data_path, file, i))
+                elif file.startswith("locust") and "_stats" in file and "history" not in file:
+                    l = int(file.split("_")[1])
+                    locust_data.append(read_iteration_data(data_path, file, l))
+    # concat all iterations at once
+    return concat_data(prometheus_data), concat_data(prometheus_custom_data), concat_data(locust_data)
+
+
+def read_iteration_data(data_path: str, file: str, iteration: int) -> pd.DataFrame:
+    """Reads the data frame of one iteration.
 
     Args:
-      data: given dataframe
+      data_path: path of the raw data
       file: data frame in file
       iteration: number of iteration
-      directory: date
-      data: pd.DataFrame: 
+      data_path: str: 
       file: str: 
       iteration: int: 
-      directory: str: 
 
     Returns:
-      connected data frame
+      data frame with iteration column
 
     """
-    data_path = os.path.join(os.getcwd(), "data", "raw", directory)
-    # concat metrics
-    tmp_data = pd.read_csv(filepath_or_buffer=os.path.join(data_path, file), delimiter=',')
-    tmp_data.insert(0, 'Iteration', iteration)
-    if data is None:
-        data = tmp_data
-    else:
-        data = pd.concat([data, tmp_data])
+    # multithreaded arrow parser, empty labels stay missing values
+    data = pa_csv.read_csv(os.path.join(data_path, file),
+                           convert_options=pa_csv.ConvertOptions(strings_can_be_null=True)).to_pandas(
+        self_destruct=True)
+    data.insert(0, 'Iteration', iteration)
     return data
 
 
+def concat_data(data: list) -> pd.DataFrame:
+    """Connects a list of data frames.
+
+    Args:
+      data: list of data frames
+      data: list: 
+
+    Returns:
+      connected data frame or None if list is empty
+
+    """
+    if not data:
+        return None
+    return pd.concat(data, ignore_index=True, copy=False)
+
+
 def get_directories() -> list:
     """Gets all directory names between the first and last data date.
     :return: list of directory names
@@ -110,12 +123,12 @@ def get_directories() -> list:
     base_path = os.path.join(os.getcwd(), "data", "raw")
     dirs = list()
     # get data from each run
-    for (dir_path, dir_names, filenames) in os.walk(base_path):
-        for c_dir in dir_names:
-            if "dataset" not in c_dir:
-                c_date = int(str(c_dir).replace('-', "").strip())
+    with os.scandir(base_path) as entries:
+        for entry in entries:
+            if entry.is_dir() and "dataset" not in entry.name:
+                c_date = int(entry.name.replace('-', "").strip())
                 if last_date >= c_date >= first_date:
-                    dirs.append(c_dir)
+                    dirs.append(entry.name)
     return dirs
 
 
@@ -131,10 +144,10 @@ def get_filtered_data(directory: str) -> pd.DataFrame:
 
     """
     base_path = os.path.join(os.getcwd(), "data", "filtered")
-    for (dir_path, dir_names, filenames) in os.walk(base_path):
-        for c_file in filenames:
-            if directory in c_file:
-                df = pd.read_csv(os.path.join(base_path, c_file))
+    with os.scandir(base_path) as entries:
+        for entry in entries:
+            if entry.is_file() and directory in entry.name:
+                df = pd.read_csv(entry.path)
                 return df
 
 
@@ -153,12 +166,12 @@ def get_all_filtered_data() -> list:
     base_path = os.path.join(os.getcwd(), "data", "filtered")
     files = list()
     # get data from each run
-    for (dir_path, dir_names, filenames) in os.walk(base_path):
-        for c_file in filenames:
-            if str(c_file).endswith(".csv"):
-                c_date = int(str(c_file).replace('-', "").replace(".csv", "").strip())
+    with os.scandir(base_path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".csv"):
+                c_date = int(entry.name.replace('-', "").replace(".csv", "").strip())
                 if last_date >= c_date >= first_date:
-                    files.append(pd.read_csv(os.path.join(base_path, c_file)))
+                    files.append(pd.read_csv(entry.path))
     return files
 
 
@@ -194,14 +207,13 @@ def get_variation_matrix(directory: str) -> np.array:
     """
     dir_path = os.path.join(os.getcwd(), "data", "raw", directory)
     # find variation files
-    for (dir_path, dir_names, filenames) in os.walk(dir_path):
-        for file in filenames:
-            if "variation" in file:
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_file() and "variation" in entry.name:
                 # filter name
-                name = str(file).split("-")[1].split("_")[0]
+                name = entry.name.split("-")[1].split("_")[0]
                 # read variation file
-                file_path = os.path.join(dir_path, file)
-                res = pd.read_csv(filepath_or_buffer=file_path, delimiter=',')
+                res = pd.read_csv(filepath_or_buffer=entry.path, delimiter=',')
                 # edit table
                 res.insert(0, 'pod', name)
                 res.rename(columns={"Unnamed: 0": "Iteration"}, inplace=True)
@@ -227,37 +239,25 @@ def filter_data(directory: str) -> pd.DataFrame:
     # filter for pod name
     filtered_data["pod"] = filtered_data["pod"].str.split("-", n=2).str[1]
     custom["pod"] = custom["pod"].str.split("-", n=2).str[1]
-    # count data points per iteration
-    filtered_data['datapoint'] = filtered_data.groupby(["Iteration"]).cumcount() + 1
-    custom['datapoint'] = custom.groupby(["Iteration"]).cumcount() + 1
     custom['pod'].fillna("webui", inplace=True)
-    # create pivot tables
-    filtered_data = pd.pivot_table(filtered_data, index=["Iteration", "pod", "datapoint"], columns=["__name__"],
-                                   values="value").reset_index()
-    filtered_custom_data = pd.pivot_table(custom, index=["Iteration", "pod", "datapoint"], columns=["metric"],
-                                          values="value").reset_index()
-    # calculate median values
-    filtered_data = filtered_data.groupby(["Iteration", "pod"]).mean().reset_index()
-    filtered_custom_data = filtered_custom_data.groupby(["Iteration", "pod"]).mean().reset_index()
+    # create pivot tables with mean values
+    filtered_data = pd.pivot_table(filtered_data, index=["Iteration", "pod"], columns=["__name__"],
+                                   values="value", aggfunc="mean")
+    filtered_custom_data = pd.pivot_table(custom, index=["Iteration", "pod"], columns=["metric"],
+                                          values="value", aggfunc="mean")
     filtered_custom_data.rename(columns={"rps": "average rps"}, inplace=True)
     # outliers
-    filtered_custom_data["median_latency"] = np.where(
-        filtered_custom_data["median_latency"] < filtered_custom_data["median_latency"].quantile(0.10),
-        filtered_custom_data["median_latency"].quantile(0.10),
-        filtered_custom_data['median_latency'])
-    filtered_custom_data["median_latency"] = np.where(
-        filtered_custom_data["median_latency"] > filtered_custom_data["median_latency"].quantile(0.90),
-        filtered_custom_data["median_latency"].quantile(0.90),
-        filtered_custom_data['median_latency'])
+    median_latency = filtered_custom_data["median_latency"]
+    median_latency = median_latency.clip(lower=median_latency.quantile(0.10))
+    filtered_custom_data["median_latency"] = median_latency.clip(upper=median_latency.quantile(0.90))
     # merge all tables
-    res_data = pd.merge(filtered_data, filtered_custom_data, how='left', on=["Iteration", "pod"])
-    res_data = pd.merge(res_data, variation, how='left', on=["Iteration", "pod"])
+    res_data = filtered_data.join([filtered_custom_data, variation.set_index(["Iteration", "pod"])],
+                                  how='left').reset_index()
     # erase stuff
     res_data.drop(columns=["kube_deployment_spec_replicas", "kube_pod_container_resource_limits_cpu_cores",
                            "kube_pod_container_resource_limits_memory_bytes",
                            "kube_pod_container_resource_requests_cpu_cores",
-                           "kube_pod_container_resource_requests_memory_bytes",
-                           "datapoint_x", "datapoint_y"], inplace=True)
+                           "kube_pod_container_resource_requests_memory_bytes"], inplace=True)
     res_data.rename(
         columns={"cpu": "cpu usage", "memory": "memory usage", "CPU": "cpu limit", "Memory": "memory limit",
                  "Pods": "number of pods", "container_cpu_cfs_throttled_seconds_total": "cpu throttled total",
@@ -366,42 +366,37 @@ def format_for_extra_p() -> None:
     # parameter and metrics
     parameter = ["cpu limit", "memory limit", "number of pods", "rps"]
     targets = ["average response time", "cpu usage", "memory usage"]
+    # write coordinates
+    # for every iteration
+    points = list()
+    for i, (c, m, p, r) in enumerate(zip(variation["CPU"], variation["Memory"], variation["Pods"], variation["RPS"])):
+        if i % m_max == 0:
+            points.append("\nPOINTS ")
+        points.append(f"( {c} {m} {p} {r} ) ")
+    points = "".join(points)
     # get all filtered data
-    filtered_data = list()
-    for f in get_all_filtered_data():
-        filtered_data.append(f)
+    filtered_data = get_all_filtered_data()
+    datapoints = range(0, filtered_data[0].index.max() + 1)
     # write in txt file
     for metric in targets:
         m_name = (re.sub('[^a-zA-Z0-9 _]', '', metric)).rstrip().replace(' ', '_').lower()
+        logging.info(f"format data: {m_name}")
+        # write parameters
+        lines = [f"PARAMETER {(re.sub('[^a-zA-Z0-9 _]', '', par)).rstrip().replace(' ', '_').lower()}\n"
+                 for par in parameter]
+        lines.append("\n")
+        lines.append(points)
+        lines.append("\n\n")
+        lines.append(f"REGION {os.getenv('APP_NAME')}\n")
+        lines.append(f"METRIC {m_name}\n")
+        lines.append("\n")
+        # write data
+        # for every datapoint
+        runs = [f[metric].reindex(datapoints).to_numpy() for f in filtered_data]
+        for values in zip(*runs):
+            lines.append("DATA " + "".join(f"{x} " for x in values) + "\n")
         with open(os.path.join(save_path, f"{os.getenv('LAST_DATA')}_{m_name}_extra-p.txt"), "x") as file:
-            # write parameters
-            for par in parameter:
-                file.write(f"PARAMETER {(re.sub('[^a-zA-Z0-9 _]', '', par)).rstrip().replace(' ', '_').lower()}\n")
-            file.write("\n")
-            # write coordinates
-            # for every iteration
-            for i, v in enumerate(variation.index):
-                if i % m_max == 0:
-                    file.write("\n")
-                    file.write("POINTS ")
-                row = variation.iloc[[i]]
-                file.write(
-                    f"( {row.iloc[0]['CPU']} {row.iloc[0]['Memory']} {row.iloc[0]['Pods']} {row.iloc[0]['RPS']} ) ")
-            file.write("\n")
-            file.write("\n")
-            file.write(f"REGION {os.getenv('APP_NAME')}\n")
-            file.write(f"METRIC {m_name}\n")
-            file.write("\n")
-            # write data
-            # for every datapoint
-            for i in range(0, (filtered_data[0].index.max() + 1)):
-                logging.info(f"format data: {i + 1}/{(filtered_data[0].index.max() + 1)}")
-                file.write("DATA ")
-                # for test purposes
-                for f in filtered_data:
-                    x = f.loc[f.index == i, metric].iloc[0]
-                    file.write(f"{x} ")
-                file.write("\n")
+            file.writelines(lines)
 
 
 def correlation_coefficient_matrix() -> None:
@@ -827,6 +822,7 @@ def plot_all_evaluation() -> None:
 
     """
     raw_path = os.path.join(os.getcwd(), "data", "raw")
-    for (dir_path, dir_names, filenames) in os.walk(raw_path):
-        for d in dir_names:
-            plot_evaluation(d)
+    with os.scandir(raw_path) as entries:
+        for entry in entries:
+            if entry.is_dir():
+                plot_evaluation(entry.name)
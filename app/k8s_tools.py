@@ -14,7 +14,7 @@ from pathlib import Path
 import docker
 import yaml
 from dotenv import load_dotenv, set_key
-from kubernetes import client, config, utils
+from kubernetes import client, config, utils, watch
 import requests
 
 # environment
@@ -314,6 +314,44 @@ def k8s_update_deployment(deployment_name: str, cpu_limit: int, memory_limit: in
     return deployment
 
 
+def k8s_wait_for_deployment(deployment_name: str, timeout: int = 180) -> bool:
+    """Waits until all replicas of a given deployment are updated and ready.
+
+    Args:
+      deployment_name: name of deployment
+      timeout: maximum waiting time in seconds
+      deployment_name: str: 
+      timeout: int: 
+
+    Returns:
+      if the deployment is ready before the timeout
+
+    """
+    # init API
+    config.load_kube_config(config_file=kube_config)
+    apps_v1 = client.AppsV1Api()
+    w = watch.Watch()
+    try:
+        # watch deployment events until rollout is complete
+        for event in w.stream(apps_v1.list_namespaced_deployment, namespace=os.getenv("NAMESPACE"),
+                              field_selector=f"metadata.name={deployment_name}", timeout_seconds=timeout):
+            deployment = event["object"]
+            status = deployment.status
+            replicas = deployment.spec.replicas
+            if (status.observed_generation or 0) >= deployment.metadata.generation \
+                    and status.updated_replicas == replicas \
+                    and status.ready_replicas == replicas \
+                    and status.replicas == replicas:
+                logging.info(f"Deployment {deployment_name} is ready.")
+                return True
+    except Exception as err:
+        logging.error(f"Error while waiting for deployment {deployment_name}: {err}")
+    finally:
+        w.stop()
+    logging.info(f"Deployment {deployment_name} is not ready after {timeout}s.")
+    return False
+
+
 def check_teastore_health() -> bool:
     """Check the health of the TeaStore webui.
     :return: if healthy
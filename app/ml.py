@@ -1,21 +1,23 @@
+import argparse
 import datetime as dt
+import functools
+import glob
 import logging
 import math
 import os
 from time import time
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
-import seaborn as sns
 from dotenv import load_dotenv, set_key
 from joblib import dump, load, numpy_pickle
 from skcriteria import Data, MIN, MAX
-from skcriteria.madm.closeness import TOPSIS
 from skcriteria.madm.simple import WeightedSum
+from sklearn.base import clone
 from sklearn.linear_model import LinearRegression, BayesianRidge
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
 from sklearn.metrics import mean_squared_error, r2_score
-from sklearn.model_selection import train_test_split, GridSearchCV
+from sklearn.model_selection import train_test_split, GridSearchCV, HalvingGridSearchCV
 from sklearn.neural_network import MLPRegressor
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.svm import SVR
@@ -23,6 +25,9 @@ from sklearn.svm import SVR
 import benchmark
 import k8s_tools
 
+# largest 2 * gamma * |x.z| for which the Maclaurin approximation replaces the exact SVR prediction
+MACLAURIN_BOUND = 0.1
+
 
 def linear_least_squares_model(target: str, save: bool) -> None:
     """Linear Regression model with given data.
@@ -150,15 +155,18 @@ def svr_model(target: str, save: bool, search: bool) -> None:
     X_train, X_test, y_train, y_test = get_processed_data(target)
     if search:
         # SVRs with different kernels
-        params = {"epsilon": np.arange(0.1, 1, 0.01)}
+        params = {"C": np.logspace(-2, 4, 7), "gamma": np.logspace(-3, 1, 9)}
         tic = time()
-        search = GridSearchCV(estimator=SVR(kernel="rbf", C=2.0, gamma=2.0, cache_size=12000), param_grid=params,
-                              verbose=1)
-        search.fit(X_train, y_train.ravel())
+        # successive halving in-process (loky workers hang under the gevent monkey-patch of benchmark)
+        grid_search = HalvingGridSearchCV(estimator=SVR(kernel="rbf", cache_size=12000),
+                                          param_grid=params, factor=3, resource="n_samples", n_jobs=1, verbose=1)
+        grid_search.fit(X_train, y_train.ravel())
         gsh_time = time() - tic
         print(f"Training time: {gsh_time}")
         print("The best parameters are %s with a score of %0.2f"
-              % (search.best_params_, search.best_score_))
+              % (grid_search.best_params_, grid_search.best_score_))
+        # best model refitted on the training set
+        svr = grid_search.best_estimator_
     else:
         svr = SVR(kernel="rbf", C=2.0, gamma=2.0, cache_size=12000)
         tic = time()
@@ -176,8 +184,120 @@ def svr_model(target: str, save: bool, search: bool) -> None:
         print("Metrics:")
         get_metrics(y_test, y_pred)
         plot_prediction(y_test, y_pred, "svr", target)
-        if save:
-            save_model(svr, target, "svr")
+    if save:
+        save_model(svr, target, "svr")
+
+
+def maclaurin_approximation(model: SVR) -> dict:
+    """Approximates a fitted RBF SVR with a second order Maclaurin expansion of its kernel.
+    exp(-g||x-z||^2) = exp(-g||x||^2) * exp(-g||z||^2) * exp(2g x.z) with exp(2g x.z) ~ 1 + 2g x.z + 2g^2 (x.z)^2,
+    so the sum over all support vectors collapses into a constant, a vector and a matrix.
+
+    Args:
+      model: fitted SVR with rbf kernel
+      model: SVR: 
+
+    Returns:
+      coefficients of the approximation
+
+    """
+    gamma = model.get_params()["gamma"]
+    support_vectors = model.support_vectors_
+    # dual coefficients weighted by the support vector norm
+    weights = model.dual_coef_.ravel() * np.exp(-gamma * np.einsum("kd,kd->k", support_vectors, support_vectors))
+    return {"gamma": gamma, "intercept": model.intercept_[0], "c": weights.sum(),
+            "v": 2 * gamma * (weights @ support_vectors),
+            "M": 2 * gamma ** 2 * np.einsum("k,kd,ke->de", weights, support_vectors, support_vectors),
+            "max_norm": np.sqrt(np.einsum("kd,kd->k", support_vectors, support_vectors).max())}
+
+
+def predict_maclaurin(approximation: dict, X: np.array) -> np.array:
+    """Predicts with a Maclaurin approximated RBF SVR in O(d^2) per sample.
+
+    Args:
+      approximation: coefficients of maclaurin_approximation
+      X: scaled parameters
+      approximation: dict: 
+      X: np.array: 
+
+    Returns:
+      predicted values
+
+    """
+    X = np.atleast_2d(X)
+    quadratic = approximation["c"] + X @ approximation["v"] + np.einsum("nd,de,ne->n", X, approximation["M"], X)
+    return np.exp(-approximation["gamma"] * np.einsum("nd,nd->n", X, X)) * quadratic + approximation["intercept"]
+
+
+def maclaurin_bound(approximation: dict, X: np.array) -> float:
+    """Upper bound of 2 * gamma * |x.z| over the given parameters and all support vectors.
+
+    Args:
+      approximation: coefficients of maclaurin_approximation
+      X: scaled parameters
+      approximation: dict: 
+      X: np.array: 
+
+    Returns:
+      upper bound
+
+    """
+    X = np.atleast_2d(X)
+    return 2 * approximation["gamma"] * np.sqrt(np.einsum("nd,nd->n", X, X).max()) * approximation["max_norm"]
+
+
+def verify_maclaurin(model: SVR, X: np.array) -> (float, float):
+    """Compares the Maclaurin approximation of an RBF SVR with its exact prediction.
+    The approximation is only accurate if 2 * gamma * |x.z| stays well below 1.
+
+    Args:
+      model: fitted SVR with rbf kernel
+      X: scaled parameters
+      model: SVR: 
+      X: np.array: 
+
+    Returns:
+      maximum absolute error and upper bound of 2 * gamma * |x.z|
+
+    """
+    approximation = maclaurin_approximation(model)
+    error = np.abs(predict_maclaurin(approximation, X) - model.predict(X)).max()
+    return error, maclaurin_bound(approximation, X)
+
+
+def has_maclaurin(model) -> bool:
+    """Checks if a model can be Maclaurin approximated, only RBF SVRs with a numeric gamma can.
+
+    Args:
+      model: trained model
+
+    Returns:
+      if it can be approximated
+
+    """
+    return isinstance(model, SVR) and model.kernel == "rbf" and not isinstance(model.get_params()["gamma"], str)
+
+
+def verify_approximations(alg: str) -> None:
+    """Logs the accuracy of the Maclaurin approximation of every model on its test set.
+
+    Args:
+      alg: algorithm
+      alg: str: 
+
+    Returns:
+      None
+
+    """
+    for t in ["average response time", "cpu usage", "memory usage"]:
+        model = load_model(t, alg)
+        if not has_maclaurin(model):
+            logging.info(f"{t}: no Maclaurin approximation for {type(model).__name__}")
+            continue
+        X_test = get_processed_data(t)[1]
+        error, bound = verify_maclaurin(model, X_test)
+        logging.info(f"{t}: max error {error} - 2*gamma*|x.z| <= {bound} - "
+                     f"{'used' if bound <= MACLAURIN_BOUND else 'exact prediction'}")
 
 
 def plot_prediction(y_test, y_pred, alg, target) -> None:
@@ -193,6 +313,9 @@ def plot_prediction(y_test, y_pred, alg, target) -> None:
       None
 
     """
+    # plotting libraries are only needed after training
+    import matplotlib.pyplot as plt
+    import seaborn as sns
     # regplot
     ax = sns.regplot(x=y_test, y=y_pred, scatter=True, fit_reg=True)
     ax.set_xlabel("Expected values")
@@ -201,42 +324,51 @@ def plot_prediction(y_test, y_pred, alg, target) -> None:
     plt.show()
 
 
-def neural_network_model(target: str, search: bool, save: bool) -> None:
+def neural_network_model(target: str, search: bool, save: bool, init: MLPRegressor = None) -> MLPRegressor:
     """MLPRegressor neural network with given data.
 
     Args:
+      init: trained network to start from
       search: use search
       save: should save
       target: target name
       target: str: 
       search: bool: 
       save: bool: 
+      init: MLPRegressor: 
 
     Returns:
-      None
+      trained network
 
     """
     # split data
     X_train, X_test, y_train, y_test = get_processed_data(target)
+    # single precision weights, datasets saved before float32 parsing are still float64
+    X_train, X_test, y_train = (d.astype(np.float32, copy=False) for d in (X_train, X_test, y_train))
     # train neural network
     mlp = None
     if search:
         # SVRs with different kernels
         params = {"alpha": np.arange(0.1, 2, 0.01)}
         tic = time()
-        search = GridSearchCV(
+        grid_search = GridSearchCV(
             estimator=MLPRegressor(solver="adam", tol=2.8284271247461903, activation="tanh", learning_rate="adaptive",
                                    max_iter=100000),
             param_grid=params,
             verbose=1)
-        search.fit(X_train, y_train.ravel())
+        grid_search.fit(X_train, y_train.ravel())
         gsh_time = time() - tic
         print(f"Training time: {gsh_time}")
-        print(f"Best params: {search.best_params_}")
+        print(f"Best params: {grid_search.best_params_}")
+        # best model refitted on the training set
+        mlp = grid_search.best_estimator_
     else:
-        mlp = MLPRegressor(solver="adam", alpha=0.49, tol=2.8284271247461903, activation="tanh",
-                           learning_rate="adaptive",
-                           max_iter=100000)
+        if init is None:
+            mlp = MLPRegressor(solver="adam", alpha=0.49, tol=2.8284271247461903, activation="tanh",
+                               learning_rate="adaptive",
+                               max_iter=100000)
+        else:
+            mlp = warm_start_model(init, X_train, y_train.ravel())
         # make predictions using the testing set
         tic = time()
         mlp.fit(X_train, y_train.ravel())
@@ -255,22 +387,50 @@ def neural_network_model(target: str, search: bool, save: bool) -> None:
     # save model
     if save:
         save_model(mlp, target, "neural_network")
+    return mlp
+
 
+def warm_start_model(model: MLPRegressor, X: np.array, y: np.array) -> MLPRegressor:
+    """Copies a trained network to continue training from its weights on another target.
+
+    Args:
+      model: trained network
+      X: training parameters of the new target
+      y: training values of the new target
+      model: MLPRegressor: 
+      X: np.array: 
+      y: np.array: 
 
-def get_data(date: str, target: str, combined: bool) -> (np.array, np.array):
+    Returns:
+      network with the weights of the given network and fresh training state
+
+    """
+    mlp = clone(model)
+    # one epoch on the new target initialises the training state
+    mlp.partial_fit(X, y)
+    # continue from the weights of the previous target
+    mlp.coefs_ = [w.copy() for w in model.coefs_]
+    mlp.intercepts_ = [b.copy() for b in model.intercepts_]
+    # loss of the initial weights is no reference for the copied ones
+    mlp.best_loss_ = np.inf
+    mlp.set_params(warm_start=True)
+    return mlp
+
+
+def get_data(date: str, targets: list, combined: bool) -> (np.array, np.array):
     """Gets filtered data and converts it to a numpy array.
 
     Args:
       combined: combined or filtered
-      target: name of target
+      targets: names of targets
       date: name of filtered data
       date: str: 
-      target: str: 
+      targets: list: 
       combined: bool) -> (np.array: 
       np.array: 
 
     Returns:
-      X, y
+      X, y with one column per target
 
     """
     # init path
@@ -278,16 +438,16 @@ def get_data(date: str, target: str, combined: bool) -> (np.array, np.array):
         path = os.path.join(os.getcwd(), "data", "combined")
     else:
         path = os.path.join(os.getcwd(), "data", "filtered")
+    parameters = ['cpu limit', 'memory limit', 'number of pods', 'average rps']
     # get data
-    for root, dirs, files in os.walk(path):
-        for file in files:
-            if date in file and "mean" not in file:
-                data = pd.read_csv(os.path.join(path, file), delimiter=",")
-                data = data.reset_index()
-                X = data[['cpu limit', 'memory limit', 'number of pods', 'average rps']].to_numpy()
-                y = data[[target]].to_numpy()
-                logging.info(f"X: {X.shape} - y: {y.shape}")
-                return X, y
+    for file in glob.iglob(os.path.join(path, f"*{date}*")):
+        if "mean" not in os.path.basename(file):
+            data = pd.read_csv(file, delimiter=",", engine="c", usecols=parameters + targets,
+                               dtype=dict.fromkeys(parameters + targets, np.float32))
+            X = np.ascontiguousarray(data[parameters].to_numpy())
+            y = np.ascontiguousarray(data[targets].to_numpy())
+            logging.info(f"X: {X.shape} - y: {y.shape}")
+            return X, y
     logging.warning(f"No filtered file with name {date} found.")
 
 
@@ -308,7 +468,11 @@ def save_model(model, name: str, alg: str) -> None:
     save_path = os.path.join(os.getcwd(), "data", "models", alg)
     if not os.path.exists(save_path):
         os.mkdir(save_path)
-    dump(model, os.path.join(save_path, f"{name}.joblib"))
+    model_path = os.path.join(save_path, f"{name}.joblib")
+    # unlink instead of truncating, loaded models may still be memory mapped
+    if os.path.exists(model_path):
+        os.remove(model_path)
+    dump(model, model_path)
 
 
 def load_model(name: str, alg: str) -> numpy_pickle:
@@ -325,7 +489,7 @@ def load_model(name: str, alg: str) -> numpy_pickle:
 
     """
     save_path = os.path.join(os.getcwd(), "data", "models", alg, f"{name}.joblib")
-    return load(save_path)
+    return load(save_path, mmap_mode="r")
 
 
 def get_best_parameters_hpa(cpu_limit: int, memory_limit: int, number_of_pods: int, rps: float, alg: str,
@@ -357,7 +521,6 @@ def get_best_parameters_hpa(cpu_limit: int, memory_limit: int, number_of_pods: i
 
     """
     # init
-    models = get_models(alg)
     cpu_limits = list()
     memory_limits = list()
     pod_limits = list()
@@ -385,36 +548,27 @@ def get_best_parameters_hpa(cpu_limit: int, memory_limit: int, number_of_pods: i
     # make parameter variation
     parameter_variations = benchmark.parameter_variation_array(cpu_limits, memory_limits, pod_limits, rps)
     # flatten possibilities
-    predict_window_list = list(np.concatenate(parameter_variations).flat)
+    predict_window_list = benchmark.flatten_variation(parameter_variations)
     # validate parameter variations
     logging.info(predict_window_list)
     predict_window_list = validate_parameter(predict_window_list, rps)
     # init arrays
-    possibilities = len(predict_window_list)
-    predictions = np.empty((len(models), possibilities))
-    prediction_array = np.zeros([possibilities, len(models)], dtype=np.float64)
     predict_window = np.array(predict_window_list, dtype=np.float64)
     if extrap:
         prediction_array = predict_extrap(predict_window_list)
     else:
-        # load parameter scaler
-        x_scaler = load(os.path.join(os.getcwd(), "data", "models", "data", f"x_scaler_average response time.gz"))
+        # load scalers
+        x_scaler, y_scalers = get_scalers()
         # scale data
         if predict_window.size != 0:
             if predict_window.size == 1:
                 predict_window = predict_window.reshape(1, -1)
             predict_window_scaled = x_scaler.transform(predict_window)
-            for i, model in enumerate(models):
-                # predict
-                predictions[i] = model.predict(predict_window_scaled)
-            # load target scaler
-            y_scalers = list()
-            for t in ["average response time", "cpu usage", "memory usage"]:
-                y_scalers.append(load(os.path.join(os.getcwd(), "data", "models", "data", f"y_scaler_{t}.gz")))
-            # format into array
-            for i in range(0, possibilities):
-                for j in range(0, len(models)):
-                    prediction_array[i, j] = y_scalers[j].inverse_transform(predictions[j, i].reshape(1, -1))
+            # predict whole window once per model
+            predictions = predict_models(alg, predict_window_scaled)
+            # rescale all predictions of a target at once
+            prediction_array = np.column_stack([y_scaler.inverse_transform(p.reshape(-1, 1)).ravel()
+                                                for y_scaler, p in zip(y_scalers, predictions)])
         else:
             return None
     logging.info(prediction_array)
@@ -426,7 +580,7 @@ def get_best_parameters_hpa(cpu_limit: int, memory_limit: int, number_of_pods: i
         prediction_array = np.delete(prediction_array, -1, 1)
         # get index of best outcome
         # if horizontal scaling only delete cpu and memory limit
-        best_outcome_index = choose_best(prediction_array.tolist(), True)
+        best_outcome_index = choose_best(prediction_array, True)
         # get parameters of best outcome
         best_parameters = prediction_array[best_outcome_index]
         logging.info(
@@ -505,7 +659,7 @@ def get_best_parameters_window(cpu_limit: int, memory_limit: int, number_of_pods
 
     """
     # init
-    step = int(os.getenv("STEP"))
+    step = get_step()
     models = get_models(alg)
     # get all possibilities in window
     current_status = np.array((cpu_limit, memory_limit, number_of_pods, rps), dtype=np.float64)
@@ -514,37 +668,23 @@ def get_best_parameters_window(cpu_limit: int, memory_limit: int, number_of_pods
                                                          number_of_pods - window, number_of_pods + window,
                                                          step, False, False, False, [int(rps)])
     # flatten possibilities
-    predict_window_list = list(np.concatenate(parameter_variations).flat)
+    predict_window_list = benchmark.flatten_variation(parameter_variations)
     # validate parameter variations
     predict_window_list = validate_parameter(predict_window_list, rps)
     # init arrays
-    possibilities = len(predict_window_list)
-    predictions = np.empty((len(models), possibilities))
-    prediction_array = np.zeros([possibilities, len(models)], dtype=np.float64)
     predict_window = np.array(predict_window_list, dtype=np.float64)
-    current_status_predicted = np.empty((len(models), 3))
     status_prediction = np.zeros([3, len(models)], dtype=np.float64)
-    # load parameter scaler
-    x_scaler = load(os.path.join(os.getcwd(), "data", "models", "data", f"x_scaler_average response time.gz"))
-    # scale data
-    predict_window_scaled = x_scaler.transform(predict_window)
-    # get predictions for each model
-    current_status_scaled = x_scaler.transform(current_status.reshape(1, -1))
-    for i, model in enumerate(models):
-        # predict
-        predictions[i] = model.predict(predict_window_scaled)
-        current_status_predicted[i] = model.predict(current_status_scaled)
-    # load target scaler
-    y_scalers = list()
-    for t in ["average response time", "cpu usage", "memory usage"]:
-        y_scalers.append(load(os.path.join(os.getcwd(), "data", "models", "data", f"y_scaler_{t}.gz")))
-    # format into array
-    for i in range(0, possibilities):
-        for j in range(0, len(models)):
-            prediction_array[i, j] = y_scalers[j].inverse_transform(predictions[j, i].reshape(1, -1))
-
-    for j in range(0, len(models)):
-        status_prediction[j] = y_scalers[j].inverse_transform(current_status_predicted[j, 0].reshape(1, -1))
+    # load scalers
+    x_scaler, y_scalers = get_scalers()
+    # scale window with current status as last row
+    predict_window_scaled = x_scaler.transform(np.vstack((predict_window, current_status)))
+    # get predictions for each model in one call
+    predicted = predict_models(alg, predict_window_scaled)
+    # rescale all predictions of a target at once
+    predicted = np.column_stack([y_scaler.inverse_transform(p.reshape(-1, 1)).ravel()
+                                 for y_scaler, p in zip(y_scalers, predicted)])
+    prediction_array = predicted[:-1]
+    status_prediction[:] = predicted[-1].reshape(-1, 1)
     # concatenate targets and parameters
     prediction_array = np.concatenate((prediction_array, predict_window), axis=1)
     # validate targets
@@ -560,9 +700,9 @@ def get_best_parameters_window(cpu_limit: int, memory_limit: int, number_of_pods
         if hpa:
             prediction_array_mod = np.delete(prediction_array, 3, 1)
             prediction_array_mod = np.delete(prediction_array_mod, 3, 1)
-            best_outcome_index = choose_best(prediction_array_mod.tolist(), True)
+            best_outcome_index = choose_best(prediction_array_mod, True)
         else:
-            best_outcome_index = choose_best(prediction_array.tolist(), True)
+            best_outcome_index = choose_best(prediction_array, True)
         # get parameters of best outcome
         best_parameters = prediction_array[best_outcome_index]
         logging.info(
@@ -597,39 +737,15 @@ def validate_targets(predictions: np.ndarray, curr_pred: np.array, curr: np.arra
       validated targets
 
     """
-    # init
-    load_dotenv()
-    i, j = predictions.shape
-    validated = list()
     # calculate difference
-    print(curr)
-    print(curr_pred)
-    r_diff = curr[0] - curr_pred[0, 0]
-    c_diff = curr[1] - curr_pred[1, 0]
-    m_diff = curr[2] - curr_pred[2, 0]
-    logging.info(f"Diff: {r_diff}ms - {c_diff}% - {m_diff}%")
-    # check every entry
-    for ix in range(0, i):
-        logging.info(f"Before: {predictions[ix]}")
-        v = True
-        for jx in range(0, j):
-            # average response time:
-            if jx == 0:
-                predictions[ix, jx] = predictions[ix, jx] + r_diff
-                if predictions[ix, jx] > curr[0]:
-                    v = False
-            # cpu usage
-            elif jx == 1:
-                predictions[ix, jx] = predictions[ix, jx] + c_diff
-            # memory usage
-            elif jx == 2:
-                predictions[ix, jx] = predictions[ix, jx] + m_diff
-        # append validated predictions
-        logging.info(f"After: {predictions[ix]}")
-        if v:
-            validated.append(predictions[ix])
-    # return list as array
-    return np.array(validated)
+    logging.debug(f"Current: {curr} - predicted: {curr_pred}")
+    diff = curr - curr_pred[:, 0]
+    logging.info(f"Diff: {diff[0]}ms - {diff[1]}% - {diff[2]}%")
+    # shift all predicted targets by the difference
+    predictions[:, :3] += diff
+    logging.debug(f"After: {predictions}")
+    # keep predictions with an average response time below the current one
+    return predictions[predictions[:, 0] <= curr[0]]
 
 
 def validate_parameter(data: list, rps: float) -> list:
@@ -649,28 +765,15 @@ def validate_parameter(data: list, rps: float) -> list:
     memory_request = int(str(request["memory"]).rstrip("Mi"))
     cpu_limit = 700
     memory_limit = 700
-    # init
-    validated = list()
-    for entry in data:
-        v = True
-        cpu, memory, pods, tmp = entry
-        if cpu < cpu_request:
-            cpu = cpu_request
-        if cpu > cpu_limit:
-            cpu = cpu_limit
-        if memory > memory_limit:
-            memory = memory_limit
-        if memory < memory_request:
-            memory = memory_request
-        if pods < 1:
-            pods = 1
-        if pods > int(os.getenv("MAX_PODS")):
-            pods = int(os.getenv("MAX_PODS"))
-        if v:
-            validated.append((cpu, memory, pods, rps))
-    # remove duplicates
-    validated = list(dict.fromkeys(validated))
-    return validated
+    # clip all entries at once
+    validated = np.array(data, dtype=np.float64).reshape(-1, 4)
+    validated[:, 0] = np.clip(validated[:, 0], cpu_request, cpu_limit)
+    validated[:, 1] = np.maximum(np.minimum(validated[:, 1], memory_limit), memory_request)
+    validated[:, 2] = np.clip(validated[:, 2], 1, int(os.getenv("MAX_PODS")))
+    validated[:, 3] = rps
+    # remove duplicates and keep order
+    _, first = np.unique(validated, axis=0, return_index=True)
+    return list(map(tuple, validated[np.sort(first)].tolist()))
 
 
 def choose_best(mtx: np.array, method: bool) -> int:
@@ -687,7 +790,6 @@ def choose_best(mtx: np.array, method: bool) -> int:
 
     """
     # min average response time, max cpu usage, max memory usage, min cpu limit, min memory limit, min number of pods
-    load_dotenv()
     criteria = [MIN, MAX, MAX, MIN, MIN, MIN]
     # b is default
     if os.getenv("WEIGHTS") == "t":
@@ -696,22 +798,51 @@ def choose_best(mtx: np.array, method: bool) -> int:
         weights = [0.1, 0.18, 0.18, 0.18, 0.18, 0.18]
     else:
         weights = [0.5, 0.1, 0.1, 0.1, 0.1, 0.1]
-    # create DecisionMaker
     if method:
-        dm = TOPSIS()
-    else:
-        dm = WeightedSum()
+        return topsis(mtx, criteria, weights)
     # create data object
     data = Data(mtx=mtx, criteria=criteria, weights=weights)
     # make decision
-    dec = dm.decide(data)
+    dec = WeightedSum().decide(data)
     logging.info(f"decisions: {dec}")
     return dec.best_alternative_
 
 
-def get_models(alg: str) -> list:
-    """Imports all models.
-    :return: list of models
+def topsis(mtx: np.array, criteria: list, weights: list) -> int:
+    """Chooses the best alternative with TOPSIS using vector normalization and sum normalized weights.
+
+    Args:
+      mtx: alternatives
+      criteria: MIN or MAX for every criterion
+      weights: weight of every criterion
+      mtx: np.array: 
+      criteria: list: 
+      weights: list: 
+
+    Returns:
+      index of best alternative
+
+    """
+    mtx = np.asarray(mtx, dtype=np.float64)
+    weights = np.asarray(weights, dtype=np.float64)
+    maximize = np.asarray(criteria) == MAX
+    # weighted normalized decision matrix
+    weighted = mtx / np.linalg.norm(mtx, axis=0) * (weights / weights.sum())
+    # ideal and anti ideal solution
+    ideal = np.where(maximize, weighted.max(axis=0), weighted.min(axis=0))
+    anti_ideal = np.where(maximize, weighted.min(axis=0), weighted.max(axis=0))
+    # relative closeness to the ideal solution
+    d_ideal = np.linalg.norm(weighted - ideal, axis=1)
+    d_anti_ideal = np.linalg.norm(weighted - anti_ideal, axis=1)
+    closeness = d_anti_ideal / (d_ideal + d_anti_ideal)
+    logging.info(f"closeness: {closeness}")
+    return int(np.argmax(closeness))
+
+
+@functools.lru_cache(maxsize=4)
+def get_models(alg: str) -> tuple:
+    """Imports all models once per algorithm.
+    :return: tuple of models
 
     Args:
       alg: str: 
@@ -724,11 +855,112 @@ def get_models(alg: str) -> list:
     for t in targets:
         model = os.path.join(os.getcwd(), "data", "models", alg, f"{t}.joblib")
         if os.path.exists(model):
-            models.append(load(model))
+            models.append(load(model, mmap_mode="r"))
         else:
             logging.error(f"No model found with name {t}")
-    print(models)
-    return models
+    logging.debug(models)
+    return tuple(models)
+
+
+@functools.lru_cache(maxsize=4)
+def get_approximations(alg: str) -> tuple:
+    """Computes the Maclaurin approximation of every RBF SVR model once per algorithm.
+
+    Args:
+      alg: str: 
+
+    Returns:
+      tuple of approximations, None for models without one
+
+    """
+    approximations = list()
+    for model in get_models(alg):
+        if has_maclaurin(model):
+            approximations.append(maclaurin_approximation(model))
+        else:
+            approximations.append(None)
+    return tuple(approximations)
+
+
+def predict_models(alg: str, X: np.array) -> np.array:
+    """Predicts the scaled parameters with every model of an algorithm.
+    If MACLAURIN is enabled, RBF SVRs use their Maclaurin approximation as long as its bound holds for X.
+
+    Args:
+      alg: algorithm
+      X: scaled parameters
+      alg: str: 
+      X: np.array: 
+
+    Returns:
+      predictions with one row per model
+
+    """
+    models = get_models(alg)
+    if os.getenv("MACLAURIN") == "True":
+        approximations = get_approximations(alg)
+    else:
+        approximations = (None,) * len(models)
+    predictions = list()
+    for model, approximation in zip(models, approximations):
+        if approximation is not None and maclaurin_bound(approximation, X) <= MACLAURIN_BOUND:
+            predictions.append(predict_maclaurin(approximation, X))
+        else:
+            # exact prediction if the expansion is not accurate enough
+            predictions.append(model.predict(X))
+    return np.vstack(predictions)
+
+
+@functools.lru_cache(maxsize=1)
+def get_scalers() -> (MinMaxScaler, tuple):
+    """Imports the parameter scaler and the target scalers once.
+
+    Args:
+
+    Returns:
+      parameter scaler and tuple of target scalers
+
+    """
+    data_path = os.path.join(os.getcwd(), "data", "models", "data")
+    x_scaler = load(os.path.join(data_path, "x_scaler_average response time.gz"))
+    y_scalers = tuple(load(os.path.join(data_path, f"y_scaler_{t}.gz"))
+                      for t in ["average response time", "cpu usage", "memory usage"])
+    return x_scaler, y_scalers
+
+
+@functools.lru_cache(maxsize=1)
+def get_step() -> int:
+    """Reads the step size from the environment once.
+
+    Args:
+
+    Returns:
+      step size
+
+    """
+    return int(os.getenv("STEP"))
+
+
+def train_model(kind: str, target: str) -> None:
+    """Trains and saves a given model type for one target.
+
+    Args:
+      kind: model type
+      target: target name
+      kind: str: 
+      target: str: 
+
+    Returns:
+      None
+
+    """
+    if kind == "neural":
+        neural_network_model(target, False, True)
+    elif kind == "linear":
+        linear_least_squares_model(target, True)
+        linear_bayesian_model(target, True, False)
+    elif kind == "svr":
+        svr_model(target, True, False)
 
 
 def train_for_all_targets(kind: str) -> None:
@@ -744,17 +976,20 @@ def train_for_all_targets(kind: str) -> None:
     """
     date = dt.datetime.now().strftime("%Y%m%d-%H%M%S")
     targets = ["average response time", "cpu usage", "memory usage"]
-    for t in targets:
-        if kind == "neural":
-            neural_network_model(t, False, True)
-        elif kind == "linear":
-            linear_least_squares_model(t, True)
-            linear_bayesian_model(t, True, False)
-        elif kind == "svr":
-            svr_model(t, True, False)
-        else:
-            logging.warning("There is no model type: " + kind)
-            return
+    if kind not in ["neural", "linear", "svr"]:
+        logging.warning("There is no model type: " + kind)
+        return
+    # release memory mapped models before their files are replaced, reloaded on next prediction
+    get_models.cache_clear()
+    get_approximations.cache_clear()
+    if kind == "neural":
+        # every target starts from the weights of the previous one
+        mlp = None
+        for t in targets:
+            mlp = neural_network_model(t, False, True, mlp)
+    else:
+        for t in targets:
+            train_model(kind, t)
     set_key(os.getenv(os.getcwd(), ".env"), "LAST_TRAINED_DATA", date)
     logging.info("All models are trained.")
 
@@ -789,23 +1024,39 @@ def processes_data() -> None:
 
     """
     load_dotenv()
-    for t in ["average response time", "cpu usage", "memory usage"]:
-        X, y = get_data(os.getenv("LAST_DATA"), t, True)
-        # split data in to train and test sets
-        X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=1)
-        # scale dataset
-        x_scaling = MinMaxScaler()
+    targets = ["average response time", "cpu usage", "memory usage"]
+    X, y = get_data(os.getenv("LAST_DATA"), targets, True)
+    # split data in to train and test sets
+    X_train, X_test, y_train, y_test = train_test_split(X, y, random_state=1)
+    # scale parameters once for all targets
+    x_scaling = MinMaxScaler()
+    X_train = x_scaling.fit_transform(X_train)
+    X_test = x_scaling.transform(X_test)
+    logging.info(f"Training size: {X_train.shape}")
+    logging.info(f"Test size: {X_test.shape}")
+    for i, t in enumerate(targets):
+        # scale target
         y_scaling = MinMaxScaler()
-        X_train = x_scaling.fit_transform(X_train)
-        y_train = y_scaling.fit_transform(y_train)
-        X_test = x_scaling.transform(X_test)
-        y_test = y_scaling.transform(y_test)
+        y_train_t = y_scaling.fit_transform(y_train[:, [i]])
+        y_test_t = y_scaling.transform(y_test[:, [i]])
         # save scaler
         dump(y_scaling, os.path.join(os.getcwd(), "data", "models", "data", f"y_scaler_{t}.gz"))
         dump(x_scaling, os.path.join(os.getcwd(), "data", "models", "data", f"x_scaler_{t}.gz"))
         # Save data
-        logging.info(f"Training size: {X_train.shape}")
-        logging.info(f"Test size: {X_test.shape}")
         d_path = os.path.join(os.getcwd(), "data", "models", "data", t)
-        for i, d in enumerate([X_train, X_test, y_train, y_test]):
-            np.save(os.path.join(d_path, str(i)), d)
+        for j, d in enumerate([X_train, X_test, y_train_t, y_test_t]):
+            np.save(os.path.join(d_path, str(j)), d)
+    # reload new scalers on next prediction
+    get_scalers.cache_clear()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(format='%(asctime)s %(levelname)-8s %(message)s', level=logging.INFO,
+                        datefmt='%Y-%m-%d %H:%M:%S')
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--verify", action="store_true", help="log accuracy of the Maclaurin approximation")
+    parser.add_argument("--alg", default="svr", help="algorithm of the models")
+    args = parser.parse_args()
+    load_dotenv()
+    if args.verify:
+        verify_approximations(args.alg)
@@ -0,0 +1,17 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# modules of the app are imported by their plain names
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def processed_data():
+    """Synthetic scaled train and test sets in the shape of get_processed_data."""
+    rng = np.random.default_rng(0)
+    X = rng.random((300, 4), dtype=np.float32)
+    y = (np.sin(3 * X[:, 0]) + X[:, 1] * X[:, 2]).reshape(-1, 1).astype(np.float32)
+    return X[:240], X[240:], y[:240], y[240:]
@@ -0,0 +1,98 @@
+import warnings
+
+import numpy as np
+from dotenv import dotenv_values
+from sklearn.exceptions import ConvergenceWarning
+
+import ml
+
+
+def test_svr_search_returns(monkeypatch, processed_data):
+    monkeypatch.setattr(ml, "get_processed_data", lambda target: processed_data)
+    saved = []
+    monkeypatch.setattr(ml, "save_model", lambda model, name, alg: saved.append(model))
+    ml.svr_model("target", True, True)
+    assert len(saved) == 1
+    assert saved[0].predict(processed_data[1]).shape == (60,)
+
+
+def test_maclaurin_used_within_bound(monkeypatch, processed_data):
+    X_train, X_test, y_train, _ = processed_data
+    svr = ml.SVR(kernel="rbf", C=2.0, gamma=0.01).fit(X_train, y_train.ravel())
+    monkeypatch.setattr(ml, "get_models", lambda alg: (svr,))
+    monkeypatch.setenv("MACLAURIN", "True")
+    ml.get_approximations.cache_clear()
+    X = X_test * 0.5
+    assert ml.maclaurin_bound(ml.get_approximations("svr")[0], X) <= ml.MACLAURIN_BOUND
+    np.testing.assert_allclose(ml.predict_models("svr", X)[0], svr.predict(X), atol=1e-3)
+    ml.get_approximations.cache_clear()
+
+
+def test_maclaurin_falls_back_to_exact_prediction(monkeypatch, processed_data):
+    X_train, X_test, y_train, _ = processed_data
+    svr = ml.SVR(kernel="rbf", C=2.0, gamma=2.0).fit(X_train, y_train.ravel())
+    monkeypatch.setattr(ml, "get_models", lambda alg: (svr,))
+    monkeypatch.setenv("MACLAURIN", "True")
+    ml.get_approximations.cache_clear()
+    assert ml.maclaurin_bound(ml.get_approximations("svr")[0], X_test) > ml.MACLAURIN_BOUND
+    np.testing.assert_array_equal(ml.predict_models("svr", X_test)[0], svr.predict(X_test))
+    ml.get_approximations.cache_clear()
+
+
+def test_warm_started_network_converges_on_second_target(processed_data):
+    X_train, X_test, y_train, y_test = processed_data
+    # second target on the same parameters
+    y2_train, y2_test = 1 - y_train / 2, 1 - y_test / 2
+    first = ml.MLPRegressor(hidden_layer_sizes=(20,), max_iter=2000, random_state=0)
+    first.fit(X_train, y_train.ravel())
+    weights = [w.copy() for w in first.coefs_]
+    second = ml.warm_start_model(first, X_train, y2_train.ravel())
+    # starts from the weights of the first network
+    for w, v in zip(weights, second.coefs_):
+        np.testing.assert_array_equal(w, v)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", ConvergenceWarning)
+        second.fit(X_train, y2_train.ravel())
+    assert second.n_iter_ < second.max_iter
+    # trained well past the loss of the copied weights instead of stopping early
+    assert second.loss_ < second.loss_curve_[1] / 4
+    # the previous network is left untouched
+    for w, v in zip(weights, first.coefs_):
+        np.testing.assert_array_equal(w, v)
+
+
+def test_verify_approximations_logs_error_and_bound(monkeypatch, caplog, processed_data):
+    X_train, X_test, y_train, _ = processed_data
+    models = {"average response time": ml.SVR(kernel="rbf", C=2.0, gamma=0.01).fit(X_train, y_train.ravel()),
+              "cpu usage": ml.SVR(kernel="rbf", C=2.0, gamma=2.0).fit(X_train, y_train.ravel()),
+              "memory usage": ml.LinearRegression().fit(X_train, y_train)}
+    monkeypatch.setattr(ml, "load_model", lambda name, alg: models[name])
+    monkeypatch.setattr(ml, "get_processed_data", lambda target: (X_train, X_test * 0.5, y_train, None))
+    with caplog.at_level("INFO"):
+        ml.verify_approximations("svr")
+    messages = [r.getMessage() for r in caplog.records]
+    assert messages[0].startswith("average response time: max error") and messages[0].endswith("used")
+    assert messages[1].startswith("cpu usage: max error") and messages[1].endswith("exact prediction")
+    assert messages[2] == "memory usage: no Maclaurin approximation for LinearRegression"
+
+def test_train_for_all_targets_saves_models(monkeypatch, tmp_path, processed_data):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "data" / "models").mkdir(parents=True)
+    (tmp_path / ".env").write_text('LAST_TRAINED_DATA="20210408-002439"\n')
+    monkeypatch.setattr(ml, "get_processed_data", lambda target: processed_data)
+    monkeypatch.setattr(ml, "plot_prediction", lambda *args: None)
+    ml.train_for_all_targets("svr")
+    for t in ["average response time", "cpu usage", "memory usage"]:
+        assert (tmp_path / "data" / "models" / "svr" / f"{t}.joblib").exists()
+    assert dotenv_values(tmp_path / ".env")["LAST_TRAINED_DATA"] != "20210408-002439"
+
+
+def test_train_for_all_targets_releases_models_before_saving(monkeypatch, processed_data):
+    monkeypatch.setattr(ml, "get_processed_data", lambda target: processed_data)
+    monkeypatch.setattr(ml, "plot_prediction", lambda *args: None)
+    monkeypatch.setattr(ml, "set_key", lambda *args: None)
+    cached = []
+    monkeypatch.setattr(ml, "save_model", lambda model, name, alg: cached.append(ml.get_models.cache_info().currsize))
+    ml.get_models("svr")
+    ml.train_for_all_targets("svr")
+    assert cached == [0, 0, 0]